@@ -0,0 +1,350 @@
+import argparse
+import io
+import json
+import os
+import sys
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable
+
+import requests
+
+from . import config
+from . import kattis
+from . import command
+from . import language
+from . import submission_queue
+
+conf, _, _ = config.get_conf()
+
+JOBS = conf['config'].getint('jobs')
+
+SessionFactory = Callable[[], requests.Session]
+
+
+def solution_files(paths: list[str]) -> list[str]:
+    files = []
+
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+
+        for file in sorted(Path(path).iterdir()):
+            try:
+                command.LANGUAGES.get_lang(str(file))
+            except language.ExtensionNotSupported:
+                continue
+
+            files.append(str(file))
+
+    return files
+
+
+def fetch_one(s: requests.Session, problem_id: str) -> dict:
+    path = kattis.problem_path(problem_id)
+    desc, samples, difficulty, title = kattis.fetch_prob(
+        s, path, with_details=True)
+    has_samples = kattis.download_samples(
+        s, path, kattis.sample_dir(problem_id))
+
+    return {
+        "problem": problem_id,
+        "title": title,
+        "difficulty": difficulty,
+        "description": desc,
+        "samples": [{"input": x.input_, "output": x.output_} for x in samples],
+        "samples_dir": kattis.sample_dir(problem_id) if has_samples else None,
+    }
+
+
+def test_one(solution_file: str, problem_id: str) -> dict:
+    log = io.StringIO()
+    result = {"file": solution_file, "problem": problem_id}
+
+    try:
+        passed = command.local_test(
+            solution_file, kattis.sample_dir(problem_id), log,
+            kattis.problem_path(problem_id))
+    except language.ExtensionNotSupported as e:
+        return {**result, "error": str(e)}
+
+    return {**result, "passed": passed, "log": log.getvalue()}
+
+
+def no_samples(solution_file: str, problem_id: str) -> dict:
+    # Nothing was tested, which must not pass as a successful test
+    return {"file": solution_file, "problem": problem_id,
+            "passed": False, "log": "No samples could be downloaded"}
+
+
+def test_group(files: list[str], problem_id: str) -> list[dict]:
+    return [test_one(f, problem_id) for f in files]
+
+
+def submit_one(s: requests.Session,
+               solution_file: str,
+               problem_id: str,
+               force: bool) -> dict:
+    path = kattis.problem_path(problem_id)
+    result = {"file": solution_file, "problem": problem_id}
+
+    if command.LOCAL_TEST:
+        if kattis.download_samples(s, path, kattis.sample_dir(problem_id)):
+            result.update(test_one(solution_file, problem_id))
+        else:
+            result.update(no_samples(solution_file, problem_id))
+
+        if not result.get("passed") and not force:
+            result["submitted"] = False
+            return result
+
+    submission_id = kattis.submit(s, path, solution_file, command.LANGUAGES)
+    status, test_cases, time_taken = command.wait_result(s, submission_id)
+    command.record_submission(
+        submission_id, path, solution_file, (status, test_cases, time_taken))
+
+    result.update({
+        "submitted": True,
+        "submission_id": submission_id,
+        "verdict": status,
+        "test_cases": test_cases,
+        "time": time_taken,
+    })
+    return result
+
+
+def run_fetch(s: requests.Session, problem_ids: list[str], jobs: int) -> list[dict]:
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(fetch_one, s, i): i for i in problem_ids}
+        results = {futures[f]: collect(f, {"problem": futures[f]})
+                   for f in as_completed(futures)}
+
+    return [results[i] for i in problem_ids]
+
+
+def run_test(s: requests.Session,
+             targets: list[tuple[str, str]],
+             jobs: int,
+             cpu_jobs: int) -> list[dict]:
+    by_problem: dict[str, list[str]] = {}
+    for f, i in targets:
+        by_problem.setdefault(i, []).append(f)
+
+    # Solutions of the same problem build into and write outputs to the same
+    # sample directory, so they are tested one after another in a single task
+    with ThreadPoolExecutor(max_workers=jobs) as net_pool, \
+            ThreadPoolExecutor(max_workers=cpu_jobs) as cpu_pool:
+        downloads = {
+            net_pool.submit(kattis.download_samples, s,
+                            kattis.problem_path(i), kattis.sample_dir(i)): i
+            for i in by_problem}
+        tests = {}
+
+        for download in as_completed(downloads):
+            i = downloads[download]
+            if download.exception():
+                tests[i] = download
+            elif download.result():
+                tests[i] = cpu_pool.submit(test_group, by_problem[i], i)
+
+    results = {(f, i): no_samples(f, i)
+               for i in by_problem if i not in tests for f in by_problem[i]}
+
+    for i, test in tests.items():
+        try:
+            results.update({(r["file"], i): r for r in test.result()})
+        except Exception as e:
+            results.update({(f, i): {"file": f, "problem": i, "error": str(e)}
+                            for f in by_problem[i]})
+
+    return [results[t] for t in targets]
+
+
+def run_queue(s: requests.Session,
+              targets: list[tuple[str, str]],
+              force: bool,
+              clear: bool,
+              interval: float,
+              jobs: int,
+              cpu_jobs: int) -> list[dict]:
+    queue = submission_queue.SubmissionQueue.load()
+    errors: dict[int, str] = {}
+    # Only entries added or acted on in this run are reported, so entries
+    # left from earlier runs do not decide the exit code
+    touched = {id(e) for e in queue.interrupted}
+
+    if clear:
+        queue.clear_finished()
+
+    for f, i in targets:
+        try:
+            entry = queue.add(f, i)
+        except (OSError, ValueError) as e:
+            entry = submission_queue.QueueEntry(
+                f, i, "", submission_queue.FAILED, str(e))
+            queue.entries.append(entry)
+        touched.add(id(entry))
+    queue.save()
+
+    pending = queue.with_status(submission_queue.PENDING)
+    touched.update(id(e) for e in pending)
+    if command.LOCAL_TEST:
+        tested = run_test(s, [(e.file, e.problem) for e in pending],
+                          jobs, cpu_jobs)
+        for e, r in zip(pending, tested):
+            queue.record_test(e, r.get("passed", False),
+                              r.get("log", r.get("error", "")))
+    else:
+        for e in pending:
+            queue.record_test(e, True, "")
+
+    to_submit = [submission_queue.PASSED]
+    if force:
+        to_submit.append(submission_queue.FAILED)
+
+    # Verdicts are collected in the background while the remaining solutions
+    # wait for their turn under the rate limit
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        waits = {pool.submit(queue.collect, s, e): e
+                 for e in queue.with_status(submission_queue.SUBMITTED)}
+
+        for e in queue.with_status(*to_submit):
+            touched.add(id(e))
+            try:
+                queue.submit(s, e, command.LANGUAGES, interval)
+            except Exception as ex:
+                errors[id(e)] = str(ex)
+                continue
+
+            waits[pool.submit(queue.collect, s, e)] = e
+
+        touched.update(id(e) for e in waits.values())
+
+        for wait in as_completed(waits):
+            if wait.exception():
+                errors[id(waits[wait])] = str(wait.exception())
+
+    return [queue_result(e, errors.get(id(e)))
+            for e in queue.entries if id(e) in touched]
+
+
+def queue_result(entry: submission_queue.QueueEntry, error: str | None) -> dict:
+    result = asdict(entry)
+
+    # The source is only kept to be submitted, and the test log no longer
+    # matters once judged
+    del result["source"]
+    if entry.status == submission_queue.JUDGED:
+        del result["log"]
+
+    return {**result, "error": error} if error else result
+
+
+def run_submit(s: requests.Session,
+               solution_file: str,
+               problem_id: str | None,
+               force: bool) -> list[dict]:
+    problem_id = problem_id or Path(solution_file).stem
+
+    # Like the other subcommands, failures are reported in the result
+    # rather than as a traceback
+    try:
+        return [submit_one(s, solution_file, problem_id, force)]
+    except Exception as e:
+        return [{"file": solution_file, "problem": problem_id, "error": str(e)}]
+
+
+def collect(future, on_error: dict) -> dict:
+    try:
+        return future.result()
+    except Exception as e:
+        return {**on_error, "error": str(e)}
+
+
+def is_ok(result: dict) -> bool:
+    if "error" in result:
+        return False
+
+    if result.get("verdict"):
+        return result["verdict"] == "Accepted"
+
+    if result.get("status") in [submission_queue.FAILED, submission_queue.UNKNOWN,
+                                submission_queue.STALE]:
+        return False
+
+    return result.get("passed", True)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="bobcat",
+        description="Run bobcat non-interactively. Results are printed as JSON.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=JOBS,
+        help=f"maximum concurrent requests to Kattis. Default: {JOBS}")
+    parser.add_argument(
+        "--cpu-jobs", type=int, default=os.cpu_count(),
+        help="maximum solutions built and tested at once. Default: number of CPUs")
+    subparsers = parser.add_subparsers(dest="subcommand", required=True)
+
+    fetch = subparsers.add_parser(
+        "fetch", help="fetch description and samples of problems")
+    fetch.add_argument("problem_ids", nargs="+", metavar="PROBLEM_ID")
+
+    test = subparsers.add_parser(
+        "test",
+        help="test solutions against samples. The problem ID is taken from the file name unless --problem is given")
+    test.add_argument("paths", nargs="+", metavar="PATH",
+                      help="solution file or directory of solution files")
+    test.add_argument("-p", "--problem", metavar="PROBLEM_ID")
+
+    submit = subparsers.add_parser("submit", help="submit a solution and wait for its verdict")
+    submit.add_argument("solution_file", metavar="SOLUTION_FILE")
+    submit.add_argument("-p", "--problem", metavar="PROBLEM_ID")
+    submit.add_argument("-f", "--force", action="store_true",
+                        help="submit even if the local test fails")
+
+    queue = subparsers.add_parser(
+        "queue",
+        help="test and submit many solutions under a rate limit. Unfinished submissions from an interrupted run are resumed")
+    queue.add_argument("targets", nargs="*", metavar="SOLUTION_FILE[:PROBLEM_ID]")
+    queue.add_argument("-f", "--force", action="store_true",
+                       help="submit even if the local test fails")
+    queue.add_argument("--clear", action="store_true",
+                       help="remove judged, failed and unknown entries from the queue first")
+    queue.add_argument(
+        "--interval", type=float, default=submission_queue.SUBMIT_INTERVAL,
+        help=f"minimum seconds between submissions. Default: {submission_queue.SUBMIT_INTERVAL}")
+
+    return parser
+
+
+def parse_target(target: str) -> tuple[str, str]:
+    file, _, problem_id = target.partition(":")
+    return file, problem_id or Path(file).stem
+
+
+def main(argv: list[str], get_session: SessionFactory) -> int:
+    args = make_parser().parse_args(argv)
+    s = get_session()
+
+    if args.subcommand == "fetch":
+        results = run_fetch(s, args.problem_ids, args.jobs)
+    elif args.subcommand == "test":
+        targets = [(f, args.problem or Path(f).stem)
+                   for f in solution_files(args.paths)]
+        results = run_test(s, targets, args.jobs, args.cpu_jobs)
+    elif args.subcommand == "queue":
+        targets = [parse_target(t) for t in args.targets]
+        results = run_queue(s, targets, args.force, args.clear,
+                            args.interval, args.jobs, args.cpu_jobs)
+    else:
+        results = run_submit(s, args.solution_file, args.problem, args.force)
+
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+    return 0 if all(is_ok(r) for r in results) else 1
@@ -0,0 +1,121 @@
+import json
+import math
+import os
+import resource
+import statistics
+import subprocess
+import time
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import config
+
+# |t| above this in Welch's t-test is treated as a real change (roughly 95%
+# confidence for the sample sizes used here)
+SIGNIFICANT_T = 2.0
+
+
+class RunFailed(Exception):
+    pass
+
+
+@dataclass
+class Summary:
+    min: float
+    median: float
+    p95: float
+    stdev: float
+
+
+def run_case(run_cmd: list[str], in_file: str, timeout: float,
+             cpu: int | None = None) -> float:
+    def pin():
+        os.sched_setaffinity(0, {cpu})
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    with open(in_file, 'rb') as f:
+        try:
+            p = subprocess.Popen(
+                run_cmd,
+                stdin=f,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                preexec_fn=pin if cpu is not None else None)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise RunFailed(f"Program failed to start: {e}")
+
+        try:
+            ret_code = p.wait(timeout)
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.wait()
+            raise RunFailed("Program timed out")
+
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    if ret_code:
+        raise RunFailed(f"Program terminated with exit code {ret_code}")
+
+    return (after.ru_utime - before.ru_utime) + \
+        (after.ru_stime - before.ru_stime)
+
+
+def summarize(times: list[float]) -> Summary:
+    ordered = sorted(times)
+    p95 = ordered[math.ceil(0.95 * len(ordered)) - 1]
+    stdev = statistics.stdev(ordered) if len(ordered) > 1 else 0.0
+
+    return Summary(ordered[0], statistics.median(ordered), p95, stdev)
+
+
+def compare(old: list[float], new: list[float]) -> str:
+    old_mean, new_mean = statistics.fmean(old), statistics.fmean(new)
+    change = (new_mean - old_mean) / old_mean * 100 if old_mean else 0.0
+
+    old_var = statistics.variance(old) if len(old) > 1 else 0.0
+    new_var = statistics.variance(new) if len(new) > 1 else 0.0
+    std_err = math.sqrt(old_var / len(old) + new_var / len(new))
+
+    if std_err:
+        significant = abs(new_mean - old_mean) / std_err > SIGNIFICANT_T
+    else:
+        significant = new_mean != old_mean
+
+    if not significant:
+        return f"{change:+.1f}% (not significant)"
+
+    return f"{change:+.1f}% ({'slower' if change > 0 else 'faster'})"
+
+
+def history_file(problem_path: str) -> str:
+    return os.path.join(config.BENCH_DIR,
+                        f"{problem_path.removeprefix('/problems/')}.json")
+
+
+def load_history(problem_path: str) -> list[dict]:
+    try:
+        with open(history_file(problem_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_run(problem_path: str, source_hash: str,
+             cases: dict[str, list[float]]):
+    # Only the latest run of each version of the source is kept
+    history = [h for h in load_history(problem_path)
+               if h['source_hash'] != source_hash]
+    history.append({"source_hash": source_hash,
+                    "time": time.time(),
+                    "cases": cases})
+
+    Path(config.BENCH_DIR).mkdir(parents=True, exist_ok=True)
+    with open(history_file(problem_path), 'w', encoding='utf-8') as f:
+        json.dump(history, f)
+
+
+def previous_run(problem_path: str, source_hash: str) -> dict | None:
+    return next((h for h in reversed(load_history(problem_path))
+                 if h['source_hash'] != source_hash), None)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 
 import getpass
-import os
+import sys
 
 from pathlib import Path
 
@@ -9,6 +9,8 @@ from . import config
 from . import state
 from . import kattis
 from . import command
+from . import batch
+from . import screen
 
 conf, secret_conf, skipped_questions = config.get_conf()
 
@@ -17,16 +19,23 @@ Q_FILTERS = conf['config']['filters'].strip().split(" ")
 Q_ORDER = conf['config']['sort_order'].strip()
 
 
-def main():
-    Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
-
+def get_session():
     has_cred = secret_conf.has_section(
         'credentials') and 'user' in secret_conf['credentials'] and 'password' in secret_conf['credentials']
     user = secret_conf['credentials']['user'] if has_cred else input("User: ")
     password = secret_conf['credentials']['password'] if has_cred else getpass.getpass(
     )
 
-    s = kattis.login(user, password)
+    return kattis.login(user, password)
+
+
+def main():
+    Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
+
+    if len(sys.argv) > 1:
+        sys.exit(batch.main(sys.argv[1:], get_session))
+
+    s = get_session()
     probs = [
         p for p in kattis.get_probs(
             s,
@@ -44,7 +53,7 @@ def main():
                 curr_state = cmd.func(curr_state, usr_input)
                 break
         else:
-            os.system('clear')
+            screen.clear()
             print(f'"{usr_input}" is not a valid command\n')
             command.cmd_help(curr_state, usr_input, clear=False)
             continue
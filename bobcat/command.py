@@ -1,17 +1,32 @@
+import dataclasses
 import os
 import glob
 import re
+import shutil
+import string
 import subprocess
 import time
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, TextIO
+
+import requests
 
 from . import state
 from . import kattis
 from . import config
 from . import model
 from . import language
+from . import problem_store
+from . import bench
+from . import profiler
+from . import interactive
+from . import history
+from . import screen
+from . import testcases
 
 
 @dataclass
@@ -36,6 +51,14 @@ TIMEOUT = conf['config'].getint("timeout")
 SOLUTION_FILE = conf['config']['solution_file']
 CACHE_DIR = conf['config']['cache']
 LOCAL_TEST = conf['config'].getboolean('local_test')
+BENCH_RUNS = conf['config'].getint('bench_runs')
+BENCH_WARMUP = conf['config'].getint('bench_warmup')
+PROFILE_TOP = conf['config'].getint('profile_top')
+JOBS = conf['config'].getint('jobs')
+INTERACTOR_TIMEOUT = conf['config'].getint('interactor_timeout')
+TRANSCRIPT_LIMIT = conf['config'].getint('transcript_limit')
+SAMPLE_LINES = conf['config'].getint('sample_lines')
+GENERATOR_TIMEOUT = conf['config'].getint('generator_timeout')
 Q_FILTERS = conf['config']['filters'].strip().split(" ")
 Q_ORDER = conf['config']['sort_order'].strip()
 
@@ -65,10 +88,10 @@ def cmd_next(s: state.State, command: str) -> state.State:
     if not (m := re.match(r'(n|N)(\s+(\d*))?', command)):
         return s
 
-    os.system('clear')
+    screen.clear()
     num = m.group(3) if m.group(3) else 1
 
-    if s.index == len(s.problems) - 1:
+    if s.index == len(s.problems) - 1 and not s.contest:
         new_probs = kattis.get_probs(s.session, Q_FILTERS, Q_ORDER, s.page + 1)
         s.page += 1
         s.problems.extend(new_probs)
@@ -84,10 +107,6 @@ def cmd_next(s: state.State, command: str) -> state.State:
 def cmd_prev(s: state.State, *_: str) -> state.State:
     index = max(0, s.index - 1)
     new_state = s.with_index(index)
-
-    # Need to repopulate samples of previous problem
-    kattis.download_samples(s.session, new_state.curr_prob.path)
-
     show_prob(new_state)
     return new_state
 
@@ -116,23 +135,30 @@ def cmd_info(s: state.State, *_: str) -> None:
 @register_command(CommandMeta("(d)escription",
                   "show description of current question", ["D"]))
 def cmd_desc(s: state.State, *_: str) -> None:
-    os.system('clear')
-    print_desc(s.curr_prob)
+    screen.page(format_desc(s.curr_prob))
 
 
-@register_command(CommandMeta("(e)xample",
-                  "show samples of current question", ["E"]))
-def cmd_example(s: state.State, *_: str) -> None:
-    os.system('clear')
+@register_command(CommandMeta("(e)xample [N]",
+                  "show samples of current question. With N, shows sample N in full", ["E"]))
+def cmd_example(s: state.State, command: str) -> None:
+    m = re.match(r'\S+(\s+(\d+))?', command)
+    screen.clear()
 
     if not s.curr_prob.samples:
         print("No samples")
         return
 
-    for i, sample in enumerate(s.curr_prob.samples):
-        print_sample(sample, i)
+    if not m.group(2):
+        screen.show("".join(format_sample(sample, i) for i, sample in enumerate(
+            s.curr_prob.samples, start=1)))
+        return
+
+    i = int(m.group(2))
+    if not 1 <= i <= len(s.curr_prob.samples):
+        print(f"No sample {i}")
+        return
 
-    return
+    screen.page(format_sample(s.curr_prob.samples[i - 1], i, truncate=False))
 
 
 @register_command(
@@ -140,16 +166,16 @@ def cmd_example(s: state.State, *_: str) -> None:
         "(t)est [SOLUTION_FILE]",
         f"runs solution file against sample and checks against expected output. Default file: {SOLUTION_FILE}",
         ["T"]))
-def cmd_test(_: state.State, command: str) -> None:
+def cmd_test(s: state.State, command: str) -> None:
     if not (m := re.match(r'(t|T)(\s+(\S*))?', command)):
         return
 
-    os.system('clear')
-    solution_file = m.group(3) if m.group(3) else SOLUTION_FILE
+    screen.clear()
+    solution_file = m.group(3) if m.group(3) else default_solution_file(s)
     print(f"Testing {solution_file}")
 
     try:
-        if local_test(solution_file):
+        if local_test(solution_file, problem_path=s.curr_prob.path):
             print("Passed all test cases")
     except language.ExtensionNotSupported as e:
         print(e)
@@ -162,11 +188,11 @@ def cmd_test(_: state.State, command: str) -> None:
         "(r)un [SOLUTION_FILE]",
         f"runs solution file against sample. Default file: {SOLUTION_FILE}",
         ["R"]))
-def cmd_run(_: state.State, command: str) -> None:
+def cmd_run(s: state.State, command: str) -> None:
     if not (m := re.match(r'(r|R)(\s+(\S*))?', command)):
         return
-    os.system('clear')
-    solution_file = m.group(3) if m.group(3) else SOLUTION_FILE
+    screen.clear()
+    solution_file = m.group(3) if m.group(3) else default_solution_file(s)
     print(f"Running {solution_file}")
 
     try:
@@ -177,6 +203,119 @@ def cmd_run(_: state.State, command: str) -> None:
         return
 
 
+@register_command(
+    CommandMeta(
+        "interact INTERACTOR_FILE [SOLUTION_FILE]",
+        f"runs solution file against an interactor for each sample, as done for interactive problems. Default file: {SOLUTION_FILE}",
+        ["INTERACT"]))
+def cmd_interact(s: state.State, command: str) -> None:
+    if not (m := re.match(r'\S+\s+(\S+)(\s+(\S+))?', command)):
+        print("Please supply a path to the interactor")
+        return
+
+    screen.clear()
+    solution_file = m.group(3) if m.group(3) else default_solution_file(s)
+    print(f"Interacting {solution_file} with {m.group(1)}")
+
+    try:
+        if local_interact(m.group(1), solution_file):
+            print("Passed all test cases")
+    except language.ExtensionNotSupported as e:
+        print(e)
+
+
+@register_command(
+    CommandMeta(
+        "(b)ench [RUNS] [@CPU] [SOLUTION_FILE]",
+        f"times solution file against samples over several runs and compares with the previous version. Default: {BENCH_RUNS} runs, file {SOLUTION_FILE}",
+        ["B", "BENCH"]))
+def cmd_bench(s: state.State, command: str) -> None:
+    if not (m := re.match(r'\S+(\s+(\d+))?(\s+@(\d+))?(\s+(\S+))?', command)):
+        return
+
+    screen.clear()
+    runs = int(m.group(2)) if m.group(2) else BENCH_RUNS
+    cpu = int(m.group(4)) if m.group(4) else None
+    solution_file = m.group(6) if m.group(6) else default_solution_file(s)
+
+    if cpu is not None and cpu not in os.sched_getaffinity(0):
+        print(f"CPU {cpu} is not available. Available: "
+              f"{', '.join(map(str, sorted(os.sched_getaffinity(0))))}")
+        return
+
+    print(f"Benchmarking {solution_file} ({runs} runs, {BENCH_WARMUP} warm-up)")
+
+    try:
+        local_bench(s.curr_prob.path, solution_file, runs, cpu)
+    except language.ExtensionNotSupported as e:
+        print(e)
+
+
+@register_command(
+    CommandMeta(
+        "profile [SOLUTION_FILE] [CASE]",
+        f"profiles solution file on a sample (largest by default) and shows where time is spent. Default file: {SOLUTION_FILE}",
+        ["PROFILE"]))
+def cmd_profile(s: state.State, command: str) -> None:
+    if not (m := re.match(r'\S+(\s+(\S+))?(\s+(\S+))?', command)):
+        return
+
+    screen.clear()
+    solution_file = m.group(2) if m.group(2) else default_solution_file(s)
+
+    try:
+        local_profile(s.curr_prob.path, solution_file, m.group(4))
+    except language.ExtensionNotSupported as e:
+        print(e)
+
+
+@register_command(
+    CommandMeta(
+        "tests [add|remove DIRECTORY]",
+        "lists, adds or removes directories of extra test cases (*.in with *.ans or *.out) for the current question",
+        ["TESTS"]))
+def cmd_tests(s: state.State, command: str) -> None:
+    m = re.match(r'\S+(\s+(add|remove)\s+(\S+))?', command, re.IGNORECASE)
+
+    screen.clear()
+    problem_id = s.curr_prob.path.removeprefix('/problems/')
+
+    if m.group(2) and m.group(2).lower() == 'add':
+        if not os.path.isdir(m.group(3)):
+            print(f"{m.group(3)} is not a directory")
+            return
+        testcases.add_dir(problem_id, m.group(3))
+    elif m.group(2) and not testcases.remove_dir(problem_id, m.group(3)):
+        print(f"{m.group(3)} is not a test directory of {problem_id}")
+        return
+
+    print(f"Test directories of {problem_id}:")
+    for d in testcases.load_dirs().get(problem_id, []):
+        print(f"{len(glob.glob(f'{d}/*.in')):>5} inputs  {d}")
+    print(f"{len(testcases.generated_inputs(problem_id)):>5} inputs  "
+          f"{testcases.generated_dir(problem_id)} (from the last gen)")
+
+
+@register_command(
+    CommandMeta(
+        "gen GENERATOR_FILE [SEED|FIRST-LAST]",
+        "generates test inputs for the current question by running the generator with each seed as its argument. Default seed: 1",
+        ["GEN"]))
+def cmd_gen(s: state.State, command: str) -> None:
+    if not (m := re.match(r'\S+\s+(\S+)(\s+(\d+)(-(\d+))?)?', command)):
+        print("Please supply a path to the generator")
+        return
+
+    screen.clear()
+    first = int(m.group(3)) if m.group(3) else 1
+    last = int(m.group(5)) if m.group(5) else first
+
+    try:
+        local_gen(s.curr_prob.path, m.group(1), list(range(first, last + 1)))
+    except language.ExtensionNotSupported as e:
+        print(e)
+
+
 @register_command(
     CommandMeta(
         "(s)ubmit [SOLUTION_FILE]",
@@ -186,11 +325,12 @@ def cmd_submit(s: state.State, command: str) -> None:
     if not (m := re.match(r'(s|S)(\s+(\S*))?', command)):
         return
 
-    os.system('clear')
-    solution_file = m.group(3) if m.group(3) else SOLUTION_FILE
+    screen.clear()
+    solution_file = m.group(3) if m.group(3) else default_solution_file(s)
 
     try:
-        if LOCAL_TEST and not local_test(solution_file):
+        if LOCAL_TEST and not local_test(
+                solution_file, problem_path=s.curr_prob.path):
             print("Local test failed")
             if input("Submit anyways? (y/N): ").upper() != 'Y':
                 return
@@ -201,22 +341,14 @@ def cmd_submit(s: state.State, command: str) -> None:
 
         spinner = "-\\|/-\\|/"
         spinner_index = 0
-        ran = False
-        while result := kattis.get_result(s.session, submission_id):
-            status, test_cases, _ = result
-            spinner_index = (spinner_index + 1) % len(spinner)
-
-            if status not in ['Running', 'New', 'Compiling']:
-                break
-
-            if not ran:
-                print(f"{status}: ({test_cases}) {spinner[spinner_index]}", end="")
-            else:
-                print(f"\r{status}: ({test_cases}) {spinner[spinner_index]}", end = "")
 
-            ran = True
+        def show_status(status: str, test_cases: str):
+            nonlocal spinner_index
+            spinner_index = (spinner_index + 1) % len(spinner)
+            print(f"\r{status}: ({test_cases}) {spinner[spinner_index]}", end="")
 
-            time.sleep(1)
+        result = wait_result(s.session, submission_id, show_status)
+        record_submission(submission_id, s.curr_prob.path, solution_file, result)
 
         print("")
         print(result)
@@ -224,40 +356,76 @@ def cmd_submit(s: state.State, command: str) -> None:
         print(e)
 
 
+@register_command(CommandMeta("history [PROBLEM_ID]",
+                  "shows your past submissions of the current question, or the question with the problem ID", ["HISTORY"]))
+def cmd_history(s: state.State, command: str) -> None:
+    m = re.match(r'\S+(\s+(\S+))?', command)
+
+    screen.clear()
+    problem_id = m.group(2) if m.group(2) else s.curr_prob.path.removeprefix(
+        '/problems/')
+    submissions = history.for_problem(problem_id)
+
+    if not submissions:
+        print(f"No submissions for {problem_id}. Use \"sync\" to fetch them from Kattis")
+        return
+
+    accepted = [x for x in submissions if x.verdict == "Accepted"]
+    times = [t for x in accepted if (t := history.cpu_seconds(x)) is not None]
+
+    print(f"{problem_id}: {len(submissions)} submissions, {len(accepted)} accepted")
+    if times:
+        print(f"Fastest accepted: {min(times):.2f} s")
+    print()
+
+    for x in submissions:
+        print(f"{x.id:<10} {x.timestamp:<20} {x.language:<12} {x.cpu_time:<8} {x.verdict}")
+
+
+@register_command(CommandMeta("sync",
+                  "fetches your new submissions from Kattis into the local history", ["SYNC"]))
+def cmd_sync(s: state.State, *_: str) -> None:
+    screen.clear()
+    print(f"{history.sync(s.session)} new submissions")
+
+
 @register_command(CommandMeta("(o)pen PROBLEM_ID",
                   "loads the problem with the problem ID", ["O"]))
 def cmd_open(s: state.State, command: str) -> state.State:
     if not (m := re.match(r'(o|O)\s+(\S*)', command)):
         return s
 
-    os.system('clear')
+    screen.clear()
 
     if not m.group(2):
         print("Problem ID required")
         return s
 
     path = f"/problems/{m.group(2)}"
+    prob = s.loaded.get(path) or problem_store.load(path)
 
-    try:
-        desc, samples, difficulty, title = kattis.fetch_prob(
-            s.session, path, with_details=True)
-    except kattis.ProblemNotFound:
-        print(f"No problems found that has a ID of {m.group(2)}")
-        return s
+    if prob is None:
+        try:
+            desc, samples, difficulty, title = kattis.fetch_prob(
+                s.session, path, with_details=True)
+        except kattis.ProblemNotFound:
+            print(f"No problems found that has a ID of {m.group(2)}")
+            return s
+
+        prob = model.ConcreteProblem(
+            difficulty=difficulty,
+            path=path,
+            title=title,
+            description=desc,
+            samples=samples)
+        problem_store.save(prob)
 
-    prob = model.ConcreteProblem(
-        difficulty=difficulty,
-        path=path,
-        title=title,
-        description=desc,
-        samples=samples)
-    kattis.download_samples(s.session, prob.path)
+    s.loaded.put(prob)
 
-    print_desc(prob)
-    for i, sample in enumerate(prob.samples, start=1):
-        print_sample(sample, i)
+    header = "" if load_samples(s.session, prob.path) else "No samples\n"
+    screen.show(header + format_prob(prob))
 
-    return state.State(s.session, s.problems, s.index, prob, s.page)
+    return dataclasses.replace(s, curr_prob=prob)
 
 
 @register_command(CommandMeta("(f)ind search term",
@@ -266,7 +434,7 @@ def cmd_find(s: state.State, command: str) -> state.State:
     if not (m := re.match(r'(f|F)\s+(\S*)', command)):
         return s
 
-    os.system('clear')
+    screen.clear()
 
     if not m.group(2):
         print("Search term required")
@@ -282,10 +450,83 @@ def cmd_find(s: state.State, command: str) -> state.State:
     return s
 
 
+@register_command(CommandMeta("contest CONTEST_ID|PROBLEM_ID,...",
+                  "fetches all problems of a contest, or of a comma separated list of problem IDs, up front", ["CONTEST"]))
+def cmd_contest(s: state.State, command: str) -> state.State:
+    if not (m := re.match(r'\S+\s+(\S+)', command)):
+        print("Contest ID or problem IDs required")
+        return s
+
+    screen.clear()
+
+    if ',' in m.group(1):
+        problem_ids = [i for i in m.group(1).split(',') if i]
+    else:
+        problem_ids = kattis.get_contest_probs(s.session, m.group(1))
+
+    if not problem_ids:
+        print(f"No problems found for {m.group(1)}")
+        return s
+
+    print(f"Fetching {len(problem_ids)} problems")
+
+    with ThreadPoolExecutor(max_workers=JOBS) as pool:
+        futures = [pool.submit(fetch_contest_prob, s.session, i)
+                   for i in problem_ids]
+
+    probs = []
+    for problem_id, future in zip(problem_ids, futures):
+        try:
+            probs.append(future.result())
+        except Exception as e:
+            print(f"Unable to fetch {problem_id}: {e}")
+
+    if not probs:
+        return s
+
+    for prob in probs:
+        s.loaded.put(prob)
+
+    if not load_samples(s.session, probs[0].path):
+        print("No samples")
+
+    problems = [model.Problem(p.title, p.path, p.difficulty) for p in probs]
+    new_state = dataclasses.replace(
+        s, problems=problems, index=0, curr_prob=probs[0], page=0,
+        contest=m.group(1), solution_files={})
+
+    print_contest(new_state)
+    return new_state
+
+
+@register_command(CommandMeta("(g)o [LETTER]",
+                  "goes to the problem with the letter in contest mode. Lists the problems if no letter is given", ["G"]))
+def cmd_go(s: state.State, command: str) -> state.State:
+    if not s.contest:
+        print("Not in contest mode")
+        return s
+
+    screen.clear()
+
+    if not (m := re.match(r'\S+\s+([a-zA-Z])$', command)):
+        print_contest(s)
+        return s
+
+    index = ord(m.group(1).upper()) - ord('A')
+    if index >= len(s.problems):
+        print(f"No problem {m.group(1).upper()}")
+        print_contest(s)
+        return s
+
+    new_state = s.with_index(index)
+    show_prob(new_state)
+    return new_state
+
+
 @register_command(CommandMeta("(c)hoose SOLUTION_FILE",
-                              "sets default solution file to use when running/submitting",
+                              "sets default solution file to use when running/submitting. In contest mode, only for the current question",
                               ['C']))
-def cmd_choose(_: state.State, command: str) -> None:
+def cmd_choose(s: state.State, command: str) -> None:
     if not (m := re.match(r'(c|C)\s+(\S+)', command)):
         print("Please supply a path to the target solution file")
         return
@@ -294,7 +535,11 @@ def cmd_choose(_: state.State, command: str) -> None:
         print("Please supply a path to the target solution file")
         return
 
-    os.system('clear')
+    screen.clear()
+
+    if s.contest:
+        s.solution_files[s.curr_prob.path] = m.group(2)
+        return
 
     global SOLUTION_FILE
     SOLUTION_FILE = m.group(2)
@@ -302,12 +547,13 @@ def cmd_choose(_: state.State, command: str) -> None:
 
 @register_command(CommandMeta("(h)elp", "displays help", ["H", "?"]))
 def cmd_help(s: state.State, *_: str, clear=True) -> None:
-    if clear:
-        os.system('clear')
     msg = "\n".join(f"{c.label}: {c.description}" for c in COMMANDS)
-    print("Commands:")
-    print(msg)
-    print()
+    text = f"Commands:\n{msg}\n\n"
+
+    if clear:
+        screen.show(text)
+    else:
+        screen.write(text)
 
 
 @register_command(CommandMeta("(q)uit", "exits the program",
@@ -334,36 +580,141 @@ def match_to_unicode(m: re.Match[str]) -> str:
 
     return unicodeit.replace(s)
 
-def print_desc(prob: model.ConcreteProblem):
-    print(f"{prob.path}")
-    print(f"{prob.title} ({prob.difficulty})")
-    print()
-    print(latex_regex.sub(match_to_unicode, prob.description))
-    print()
+def format_desc(prob: model.ConcreteProblem) -> str:
+    description = latex_regex.sub(match_to_unicode, prob.description)
+    return f"{prob.path}\n{prob.title} ({prob.difficulty})\n\n{description}\n\n"
+
+
+def truncate_sample(text: str, i: int) -> str:
+    lines = text.splitlines()
+
+    if len(lines) <= SAMPLE_LINES:
+        return text
+
+    return "\n".join([*lines[:SAMPLE_LINES],
+                      f"... {len(lines) - SAMPLE_LINES} more lines. Use (e)xample {i} to see all"])
+
+
+def format_sample(sample: model.Sample, i: int, truncate=True) -> str:
+    input_, output_ = sample.input_, sample.output_
 
+    # Long samples are only cut short when someone is reading them
+    if truncate and screen.is_tty():
+        input_, output_ = truncate_sample(input_, i), truncate_sample(output_, i)
 
-def print_sample(sample: model.Sample, i: int):
-    print(f"Input {i}")
-    print(sample.input_)
+    return f"Input {i}\n{input_}\n\nOutput {i}\n{output_}\n\n"
+
+
+def format_prob(prob: model.ConcreteProblem) -> str:
+    return format_desc(prob) + "".join(
+        format_sample(sample, i) for i, sample in enumerate(prob.samples, start=1))
+
+
+def print_contest(s: state.State):
+    print(f"Contest {s.contest}")
     print()
-    print(f"Output {i}")
-    print(sample.output_)
+
+    for letter, p in zip(string.ascii_uppercase, s.problems):
+        marker = ">" if p.path == s.curr_prob.path else " "
+        print(f"{marker} {letter}  {p.title:<40} {p.difficulty:<6} {default_solution_file(s, p.path)}")
+
     print()
 
 
+def default_solution_file(s: state.State, path: str | None = None) -> str:
+    path = path or s.curr_prob.path
+    return s.solution_files.get(
+        path, SOLUTION_FILE.format(problem=path.removeprefix('/problems/')))
+
+
+def fetch_contest_prob(session: requests.Session, problem_id: str) -> model.ConcreteProblem:
+    path = f"/problems/{problem_id}"
+
+    if not (prob := problem_store.load(path)):
+        desc, samples, difficulty, title = kattis.fetch_prob(
+            session, path, with_details=True)
+        prob = model.ConcreteProblem(title, path, difficulty, desc, samples)
+        problem_store.save(prob)
+
+    if not kattis.has_samples(problem_id):
+        kattis.download_samples(
+            session, path, kattis.sample_dir(problem_id))
+
+    return prob
+
+
+def load_samples(session: requests.Session, path: str) -> bool:
+    problem_id = path.removeprefix('/problems/')
+    problem_dir = kattis.sample_dir(problem_id)
+
+    # Samples of each problem are kept after the first download, so moving
+    # between problems only copies them into the cache directory
+    downloaded = kattis.has_samples(problem_id) or kattis.download_samples(
+        session, path, problem_dir)
+
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    if downloaded:
+        shutil.copytree(problem_dir, CACHE_DIR)
+    else:
+        Path(CACHE_DIR).mkdir(parents=True, exist_ok=True)
+
+    return bool(glob.glob(f'{CACHE_DIR}/*.in'))
+
+
+def load_prob(s: state.State, prob: model.Problem) -> model.ConcreteProblem:
+    if loaded := s.loaded.get(prob.path):
+        return loaded
+
+    if not (loaded := problem_store.load(prob.path)):
+        desc, samples = kattis.fetch_prob(s.session, prob.path)
+        loaded = model.ConcreteProblem(
+            prob.title, prob.path, prob.difficulty, desc, samples)
+        problem_store.save(loaded)
+
+    s.loaded.put(loaded)
+    return loaded
+
+
 def show_prob(s: state.State):
-    os.system('clear')
+    header = ""
     if not isinstance(s.curr_prob, model.ConcreteProblem):
-        kattis.download_samples(s.session, s.curr_prob.path)
+        if not load_samples(s.session, s.curr_prob.path):
+            header = "No samples\n"
+
+        s.curr_prob = load_prob(s, s.curr_prob)
+
+    screen.show(header + format_prob(s.curr_prob))
+
+
+def wait_result(session: requests.Session,
+                submission_id: int,
+                on_update: Callable[[str, str], None] | None = None) -> tuple[str, str, str]:
+    while result := kattis.get_result(session, submission_id):
+        status, test_cases, _ = result
+
+        if status not in kattis.PENDING_STATUSES:
+            break
+
+        if on_update:
+            on_update(status, test_cases)
+
+        time.sleep(1)
+
+    return result
 
-        desc, samples = kattis.fetch_prob(s.session, s.curr_prob.path)
-        s.curr_prob = model.ConcreteProblem(
-            **s.curr_prob.__dict__, description=desc, samples=samples)
-        s.problems[s.index] = s.curr_prob
 
-    print_desc(s.curr_prob)
-    for i, sample in enumerate(s.curr_prob.samples, start=1):
-        print_sample(sample, i)
+def record_submission(submission_id: int,
+                      problem_path: str,
+                      solution_file: str,
+                      result: tuple[str, str, str]):
+    status, _, time_taken = result
+    history.add(model.Submission(
+        submission_id,
+        problem_path.removeprefix('/problems/'),
+        LANGUAGES.get_lang(solution_file).name,
+        status,
+        time_taken,
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
 
 
 def local_run(solution_file=SOLUTION_FILE, test_case_dir=CACHE_DIR):
@@ -371,37 +722,30 @@ def local_run(solution_file=SOLUTION_FILE, test_case_dir=CACHE_DIR):
 
     in_files = sorted(glob.glob(f'{test_case_dir}/*.in'))
 
-    for file in in_files:
-        build_cmd = lang.build_cmd.format(
-            source_file=solution_file, cache_dir=test_case_dir)
-        build_code = subprocess.Popen(
-            build_cmd, shell=True, stdout=subprocess.PIPE).wait()
+    if not in_files:
+        return
 
-        if build_code > 0:
-            print("Build failed")
-            break
+    build_cmd = lang.format_build(solution_file, test_case_dir)
+    build_code = subprocess.Popen(
+        build_cmd, shell=True, stdout=subprocess.PIPE).wait()
 
-        run_cmd = lang.run_cmd.format(
-            source_file=solution_file, cache_dir=test_case_dir)
-        run_cmd = f'timeout {TIMEOUT} {run_cmd} < {file}'
-        p = subprocess.Popen(
-            run_cmd,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE)
-        ret_code = p.wait()
-        out = p.stdout.read().decode('utf8')
-        err = p.stderr.read().decode('utf8')
+    if build_code > 0:
+        print("Build failed")
+        return
 
-        print("Input: ")
+    run_cmd = lang.format_run(solution_file, test_case_dir)
+
+    for file in in_files:
+        out_file = f"{file.removesuffix('.in')}.out"
+        ret_code, err = testcases.run(run_cmd, file, out_file, TIMEOUT)
 
-        with open(file, 'r', encoding='utf-8') as f:
-            print(f.read())
+        print("Input: ")
+        print(testcases.preview(file))
 
         print("Output: ")
-        print(out)
+        print(testcases.preview(out_file))
 
-        if ret_code == 124:
+        if ret_code is None:
             print("Program timed out")
         elif ret_code or err:
             print(f"Program terminated with exit code {ret_code}")
@@ -410,18 +754,50 @@ def local_run(solution_file=SOLUTION_FILE, test_case_dir=CACHE_DIR):
         print()
 
 
-def local_test(solution_file=SOLUTION_FILE, test_case_dir=CACHE_DIR) -> bool:
-    lang = LANGUAGES.get_lang(solution_file)
+def local_gen(problem_path: str,
+              generator_file: str,
+              seeds: list[int],
+              test_case_dir=CACHE_DIR):
+    lang = LANGUAGES.get_lang(generator_file)
+    problem_id = problem_path.removeprefix('/problems/')
 
-    in_files = sorted(glob.glob(f'{test_case_dir}/*.in'))
+    generator_dir = os.path.join(test_case_dir, 'generator')
+    Path(generator_dir).mkdir(parents=True, exist_ok=True)
 
-    is_correct = True
-    for file in in_files:
-        out_file = file.replace(".in", ".out")
-        ans_file = file.replace(".in", ".ans")
+    build_cmd = lang.format_build(generator_file, generator_dir)
+    build_code = subprocess.Popen(
+        build_cmd, shell=True, stdout=subprocess.PIPE).wait()
 
-        build_cmd = lang.build_cmd.format(
-            source_file=solution_file, cache_dir=test_case_dir)
+    if build_code > 0:
+        print("Build failed")
+        return
+
+    run_cmd = lang.format_run(generator_file, generator_dir)
+    errors = testcases.generate(run_cmd, problem_id, language.source_hash(
+        generator_file), seeds, GENERATOR_TIMEOUT)
+
+    for seed, err in errors.items():
+        print(f"Seed {seed}: {err}")
+
+    print(f"{len(testcases.generated_inputs(problem_id))} inputs in "
+          f"{testcases.generated_dir(problem_id)}")
+
+
+def local_interact(interactor_file: str,
+                   solution_file=SOLUTION_FILE,
+                   test_case_dir=CACHE_DIR) -> bool:
+    lang = LANGUAGES.get_lang(solution_file)
+    interactor_lang = LANGUAGES.get_lang(interactor_file)
+    # Built separately so that a solution and interactor in the same
+    # language do not overwrite each other's binary
+    interactor_dir = os.path.join(test_case_dir, 'interactor')
+    Path(interactor_dir).mkdir(parents=True, exist_ok=True)
+
+    builds = [
+        lang.format_build(solution_file, test_case_dir),
+        interactor_lang.format_build(interactor_file, interactor_dir),
+    ]
+    for build_cmd in builds:
         build_code = subprocess.Popen(
             build_cmd, shell=True, stdout=subprocess.PIPE).wait()
 
@@ -429,47 +805,175 @@ def local_test(solution_file=SOLUTION_FILE, test_case_dir=CACHE_DIR) -> bool:
             print("Build failed")
             return False
 
-        run_cmd = lang.run_cmd.format(
-            source_file=solution_file, cache_dir=test_case_dir)
-        diff_cmd = f'timeout {TIMEOUT} {run_cmd} < {file} > {out_file}'
-        p = subprocess.Popen(diff_cmd, shell=True,
-                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    run_cmd = lang.format_run(solution_file, test_case_dir)
+    interactor_cmd = interactor_lang.format_run(interactor_file, interactor_dir)
+
+    # Interactors are given the input file, answer file and feedback
+    # directory, as on Kattis
+    in_files = sorted(glob.glob(f'{test_case_dir}/*.in'))
+    cases = [(os.path.basename(f), [f, f.replace(".in", ".ans"), interactor_dir])
+             for f in in_files] or [("Interaction", [])]
 
-        ret_code = p.wait()
-        err = p.stderr.read().decode('ascii')
+    is_correct = True
+    for case, args in cases:
+        result = interactive.run(run_cmd, interactor_cmd + args, TIMEOUT,
+                                 INTERACTOR_TIMEOUT, TRANSCRIPT_LIMIT)
+        print(f"{case}: {result.verdict} ({result.time_taken:.2f}s)")
 
-        if err or ret_code:
-            print("Input: ")
+        if result.verdict == "Accepted":
+            continue
 
-            with open(file, 'r', encoding="utf-8") as f:
-                print(f.read())
+        is_correct = False
+
+        if result.transcript:
+            print("Transcript (> solution, < interactor): ")
+            print(result.transcript)
+        if result.solution_err:
+            print("Solution stderr: ")
+            print(result.solution_err)
+        if result.interactor_err:
+            print("Interactor stderr: ")
+            print(result.interactor_err)
+        print()
 
-            if ret_code == 124:
-                print("Program timed out")
-            else:
-                print(f"Program terminated with exit code of {ret_code}")
-                print(err)
-            print()
-            is_correct = False
+    return is_correct
+
+
+def local_bench(problem_path: str,
+                solution_file=SOLUTION_FILE,
+                runs=BENCH_RUNS,
+                cpu: int | None = None,
+                test_case_dir=CACHE_DIR):
+    lang = LANGUAGES.get_lang(solution_file)
+
+    in_files = [f for f, _, _ in testcases.cases(
+        test_case_dir, problem_path.removeprefix('/problems/'))]
+
+    build_cmd = lang.format_build(solution_file, test_case_dir)
+    build_code = subprocess.Popen(
+        build_cmd, shell=True, stdout=subprocess.PIPE).wait()
+
+    if build_code > 0:
+        print("Build failed")
+        return
+
+    run_cmd = lang.format_run(solution_file, test_case_dir)
+    source_hash = language.source_hash(solution_file)
+    previous = bench.previous_run(problem_path, source_hash)
+
+    print(f"{'Case':<32}{'min':>9}{'median':>9}{'p95':>9}{'stdev':>9}  vs previous")
+
+    cases = {}
+    for file in in_files:
+        case = testcases.case_name(file, test_case_dir)
+
+        try:
+            for _ in range(BENCH_WARMUP):
+                bench.run_case(run_cmd, file, TIMEOUT, cpu)
+            times = [bench.run_case(run_cmd, file, TIMEOUT, cpu)
+                     for _ in range(runs)]
+        except bench.RunFailed as e:
+            print(f"{case:<32}{e}")
             continue
 
-        diff = subprocess.Popen(
-            f'diff --unified {ans_file} {out_file}',
-            shell=True,
-            stdout=subprocess.PIPE).stdout.read().decode('ascii')
+        cases[case] = times
+        summary = bench.summarize(times)
+        change = bench.compare(previous['cases'][case], times) \
+            if previous and case in previous['cases'] else "-"
+
+        print(f"{case:<32}{summary.min:>8.3f}s{summary.median:>8.3f}s"
+              f"{summary.p95:>8.3f}s{summary.stdev:>8.3f}s  {change}")
+
+    if cases:
+        bench.save_run(problem_path, source_hash, cases)
 
-        if diff:
-            print(f"Solution produces different output for {file}")
-            print("Input: ")
 
-            with open(file, 'r') as f:
-                print(f.read())
+def local_profile(problem_path: str,
+                  solution_file=SOLUTION_FILE,
+                  case: str | None = None,
+                  test_case_dir=CACHE_DIR):
+    lang = LANGUAGES.get_lang(solution_file)
+
+    in_files = [f for f, _, _ in testcases.cases(
+        test_case_dir, problem_path.removeprefix('/problems/'))]
+    if not (in_file := profiler.find_case(in_files, test_case_dir, case)):
+        print(f"No test case {case}" if case else "No test cases")
+        return
+
+    build_cmd = lang.format_build(solution_file, test_case_dir)
+    build_code = subprocess.Popen(
+        build_cmd, shell=True, stdout=subprocess.PIPE).wait()
+
+    if build_code > 0:
+        print("Build failed")
+        return
+
+    run_cmd = lang.format_run(solution_file, test_case_dir)
+    print(f"Profiling {solution_file} on {in_file}")
+    print()
+
+    profiler.profile(run_cmd, in_file, test_case_dir,
+                     lang.ext == '.py', TIMEOUT, PROFILE_TOP)
+
+
+def local_test(solution_file=SOLUTION_FILE,
+               test_case_dir=CACHE_DIR,
+               out: TextIO | None = None,
+               problem_path: str | None = None) -> bool:
+    lang = LANGUAGES.get_lang(solution_file)
+
+    problem_id = problem_path.removeprefix('/problems/') if problem_path else None
+    cases = testcases.cases(test_case_dir, problem_id)
+
+    if not cases:
+        return True
 
-            print()
+    for out_dir in {os.path.dirname(out_file) for _, _, out_file in cases}:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
 
-            print("Diff: ")
-            print(diff)
-            print()
+    build_cmd = lang.format_build(solution_file, test_case_dir)
+    build_code = subprocess.Popen(
+        build_cmd, shell=True, stdout=subprocess.PIPE).wait()
+
+    if build_code > 0:
+        print("Build failed", file=out)
+        return False
+
+    run_cmd = lang.format_run(solution_file, test_case_dir)
+
+    is_correct = True
+    for file, ans_file, out_file in cases:
+        ret_code, err = testcases.run(run_cmd, file, out_file, TIMEOUT)
+
+        if err or ret_code != 0:
+            print("Input: ", file=out)
+            print(testcases.preview(file), file=out)
+
+            if ret_code is None:
+                print("Program timed out", file=out)
+            else:
+                print(f"Program terminated with exit code of {ret_code}", file=out)
+                print(err, file=out)
+            print(file=out)
+            is_correct = False
+            continue
+
+        # Generated inputs usually have no answer, so they only check that
+        # the solution finishes in time
+        if ans_file is None:
+            continue
+
+        diff = testcases.compare(out_file, ans_file)
+
+        if diff:
+            print(f"Solution produces different output for {file}", file=out)
+            print("Input: ", file=out)
+            print(testcases.preview(file), file=out)
+            print(file=out)
+
+            print("Diff: ", file=out)
+            print(diff, file=out)
+            print(file=out)
             is_correct = False
 
     return is_correct
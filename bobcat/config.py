@@ -20,6 +20,23 @@ SKIP_DIR = os.path.join(
     'bobcat')
 
 SKIP_FILE = os.path.join(SKIP_DIR, 'skipped')
+QUEUE_FILE = os.path.join(SKIP_DIR, 'queue.json')
+HISTORY_FILE = os.path.join(SKIP_DIR, 'submissions.json')
+TESTS_FILE = os.path.join(SKIP_DIR, 'tests.json')
+
+CACHE_HOME_DIR = os.path.join(
+    os.environ.get(
+        'XDG_CACHE_HOME',
+        os.path.join(
+            Path.home(),
+            '.cache')),
+    'bobcat')
+
+PROBLEM_STORE_DIR = os.path.join(CACHE_HOME_DIR, 'problems')
+BENCH_DIR = os.path.join(CACHE_HOME_DIR, 'bench')
+SAMPLES_DIR = os.path.join(CACHE_HOME_DIR, 'samples')
+GENERATED_DIR = os.path.join(CACHE_HOME_DIR, 'generated')
+OUTPUTS_DIR = os.path.join(CACHE_HOME_DIR, 'outputs')
 
 
 def get_conf() -> tuple[ConfigParser, ConfigParser, list[str]]:
@@ -0,0 +1,93 @@
+import json
+import os
+import re
+import threading
+
+from dataclasses import asdict
+from itertools import count
+from pathlib import Path
+
+import requests
+
+from . import config
+from . import kattis
+from .model import Submission
+
+lock = threading.Lock()
+
+
+def read() -> tuple[list[Submission], int | None]:
+    try:
+        with open(config.HISTORY_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return [], None
+
+    # Older files only hold the list of submissions
+    if isinstance(data, list):
+        data = {"synced": None, "submissions": data}
+
+    return [Submission(**x) for x in data["submissions"]], data["synced"]
+
+
+def load() -> list[Submission]:
+    return read()[0]
+
+
+def save(submissions: list[Submission], synced: int | None):
+    Path(config.HISTORY_FILE).parent.mkdir(parents=True, exist_ok=True)
+    submissions = sorted(submissions, key=lambda x: x.id, reverse=True)
+    data = {"synced": synced, "submissions": [asdict(x) for x in submissions]}
+
+    tmp_file = f"{config.HISTORY_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_file, config.HISTORY_FILE)
+
+
+def add(submission: Submission):
+    with lock:
+        submissions, synced = read()
+        save([submission, *(x for x in submissions if x.id != submission.id)], synced)
+
+
+def sync(s: requests.Session) -> int:
+    username = kattis.get_username(s)
+
+    with lock:
+        submissions, synced = read()
+        known = {x.id for x in submissions}
+        new = []
+        newest = synced
+
+        # Submissions are also stored as they are judged, so a stored id does
+        # not mean older ones were fetched. The listing is newest first, and
+        # everything up to the newest id of the last completed sync is stored
+        for page in count():
+            listed = kattis.get_submissions(s, username, page)
+            finished = [x for x in listed if x.verdict not in kattis.PENDING_STATUSES]
+            pending = [x for x in listed if x.verdict in kattis.PENDING_STATUSES]
+
+            new.extend(x for x in finished if x.id not in known)
+            known.update(x.id for x in finished)
+
+            # Pending submissions are fetched again by the next sync
+            newest = max([newest or 0, *(x.id for x in finished)])
+            if pending:
+                newest = min(newest, min(x.id for x in pending) - 1)
+
+            if not listed or (synced is not None and any(x.id <= synced for x in listed)):
+                break
+
+        save([*new, *submissions], newest or synced)
+
+    return len(new)
+
+
+def for_problem(problem_id: str) -> list[Submission]:
+    return [x for x in load() if x.problem == problem_id]
+
+
+def cpu_seconds(submission: Submission) -> float | None:
+    m = re.match(r'[\d.]+', submission.cpu_time)
+    return float(m.group(0)) if m else None
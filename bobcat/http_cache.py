@@ -0,0 +1,143 @@
+import configparser
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from . import config
+
+CACHE_DIR = os.path.join(config.CACHE_HOME_DIR, 'http')
+
+NO_STORE = "no-store"
+REVALIDATE = "revalidate"
+
+# Only these headers are kept, as the stored body is already decoded
+STORED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Cache-Control', 'Date']
+
+max_age_regex = re.compile(r'max-age=(\d+)')
+
+
+def make_policies(conf: configparser.ConfigParser) -> list[tuple[re.Pattern, str]]:
+    return [(re.compile(k), v.strip()) for k, v in conf["http_cache"].items()]
+
+
+def stored_headers(response: requests.Response) -> dict:
+    return {h: response.headers[h] for h in STORED_HEADERS if h in response.headers}
+
+
+def lifetime(policy: str, cache_control: str) -> float | None:
+    if policy == NO_STORE or NO_STORE in cache_control:
+        return None
+
+    if "no-cache" in cache_control:
+        return 0
+
+    if m := max_age_regex.search(cache_control):
+        return int(m.group(1))
+
+    return 0 if policy == REVALIDATE else float(policy)
+
+
+class CachingAdapter(HTTPAdapter):
+    def __init__(self, policies: list[tuple[re.Pattern, str]],
+                 cache_dir: str = CACHE_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.policies = policies
+        self.cache_dir = cache_dir
+
+    def policy(self, url: str) -> str:
+        parts = urlsplit(url)
+        target = f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+        return next((v for k, v in self.policies if k.search(target)), NO_STORE)
+
+    def cache_file(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode()).hexdigest())
+
+    def load(self, url: str) -> tuple[dict, bytes] | None:
+        try:
+            with open(f"{self.cache_file(url)}.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self.cache_file(url), 'rb') as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def write(self, file: str, data: bytes):
+        # Written to a temporary file first so that concurrent requests never
+        # see a partial body
+        fd, tmp_file = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_file, file)
+
+    def store(self, url: str, headers: dict, body: bytes | None, life: float):
+        Path(self.cache_dir).mkdir(parents=True, exist_ok=True)
+        meta = {"headers": headers, "expires": time.time() + life}
+
+        if body is not None:
+            self.write(self.cache_file(url), body)
+        self.write(f"{self.cache_file(url)}.json", json.dumps(meta).encode())
+
+    def cached_response(self, req, headers: dict, body: bytes):
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = req.url
+        response.request = req
+        response.connection = self
+        response._content = body
+        response._content_consumed = True
+
+        return response
+
+    def send(self, request, **kwargs):
+        policy = self.policy(request.url)
+
+        if request.method != 'GET' or policy == NO_STORE:
+            return super().send(request, **kwargs)
+
+        cached = self.load(request.url)
+
+        if cached:
+            meta, body = cached
+            if meta["expires"] > time.time():
+                return self.cached_response(request, meta["headers"], body)
+
+            if etag := meta["headers"].get('ETag'):
+                request.headers['If-None-Match'] = etag
+            if last_modified := meta["headers"].get('Last-Modified'):
+                request.headers['If-Modified-Since'] = last_modified
+
+        response = super().send(request, **kwargs)
+        cache_control = response.headers.get('Cache-Control', '')
+
+        if cached and response.status_code == 304:
+            response.close()
+            headers = {**meta["headers"], **stored_headers(response)}
+            if (life := lifetime(policy, cache_control)) is not None:
+                self.store(request.url, headers, None, life)
+
+            return self.cached_response(request, headers, body)
+
+        life = lifetime(policy, cache_control)
+        if response.status_code != 200 or life is None:
+            return response
+
+        headers = stored_headers(response)
+        if life or 'ETag' in headers or 'Last-Modified' in headers:
+            self.store(request.url, headers, response.content, life)
+
+        return response
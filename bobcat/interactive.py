@@ -0,0 +1,181 @@
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+from collections import deque
+from dataclasses import dataclass, field
+from itertools import groupby
+
+# Exit codes used by Kattis interactors to report the verdict
+ACCEPTED_CODE = 42
+WRONG_ANSWER_CODE = 43
+
+CHUNK_SIZE = 1 << 16
+
+
+@dataclass
+class Transcript:
+    limit: int
+    entries: deque[tuple[str, bytes]] = field(default_factory=deque)
+    size: int = 0
+    dropped: int = 0
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, tag: str, chunk: bytes):
+        chunk = chunk[-self.limit:]
+
+        with self.lock:
+            self.entries.append((tag, chunk))
+            self.size += len(chunk)
+
+            # Only the end of the transcript is kept, as that is where the
+            # interaction went wrong
+            while self.size > self.limit:
+                _, old = self.entries.popleft()
+                self.size -= len(old)
+                self.dropped += len(old)
+
+    def __str__(self):
+        lines = [f"... ({self.dropped} bytes omitted)"] if self.dropped else []
+
+        # Reads do not line up with lines, so consecutive chunks from the same
+        # side are joined before splitting
+        for tag, chunks in groupby(self.entries, key=lambda e: e[0]):
+            text = b"".join(c for _, c in chunks).decode('utf8', errors='replace')
+            lines.extend(f"{tag} {line}" for line in text.splitlines())
+
+        return "\n".join(lines)
+
+
+@dataclass
+class Result:
+    verdict: str
+    time_taken: float
+    solution_err: str
+    interactor_err: str
+    transcript: Transcript | None
+
+
+def relay(src, dst, tag: str, transcript: Transcript):
+    try:
+        while chunk := os.read(src.fileno(), CHUNK_SIZE):
+            transcript.record(tag, chunk)
+            view = memoryview(chunk)
+
+            while view:
+                view = view[os.write(dst.fileno(), view):]
+    except OSError:
+        pass
+    finally:
+        src.close()
+
+        try:
+            dst.close()
+        except BrokenPipeError:
+            pass
+
+
+def wait(p: subprocess.Popen, deadline: float) -> bool:
+    try:
+        p.wait(max(0, deadline - time.monotonic()))
+        return False
+    except subprocess.TimeoutExpired:
+        p.kill()
+        p.wait()
+        return True
+
+
+def stop_solution(inter: subprocess.Popen, sol: subprocess.Popen,
+                  stopped: threading.Event):
+    # Once the interactor has given its verdict, the solution has nothing
+    # left to do, as on Kattis
+    if inter.wait() in [ACCEPTED_CODE, WRONG_ANSWER_CODE] and sol.poll() is None:
+        stopped.set()
+        sol.kill()
+
+
+def verdict(solution_code: int, interactor_code: int,
+            solution_timed_out: bool, interactor_timed_out: bool,
+            solution_stopped: bool = False) -> str:
+    if interactor_timed_out:
+        return "Interactor timed out"
+
+    if solution_timed_out:
+        return "Time Limit Exceeded"
+
+    if interactor_code == WRONG_ANSWER_CODE:
+        return "Wrong Answer"
+
+    if interactor_code != ACCEPTED_CODE:
+        return f"Interactor failed with exit code {interactor_code}"
+
+    if solution_code and not solution_stopped:
+        return f"Run Time Error (exit code {solution_code})"
+
+    return "Accepted"
+
+
+def run(solution_cmd: list[str],
+        interactor_cmd: list[str],
+        timeout: float,
+        interactor_timeout: float,
+        transcript_limit: int) -> Result:
+    with tempfile.TemporaryFile() as sol_err, tempfile.TemporaryFile() as int_err:
+        start = time.monotonic()
+
+        if transcript_limit:
+            transcript = Transcript(transcript_limit)
+            sol = subprocess.Popen(solution_cmd, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=sol_err)
+            inter = subprocess.Popen(interactor_cmd, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=int_err)
+            relays = [
+                threading.Thread(target=relay, args=(
+                    sol.stdout, inter.stdin, ">", transcript), daemon=True),
+                threading.Thread(target=relay, args=(
+                    inter.stdout, sol.stdin, "<", transcript), daemon=True),
+            ]
+            for r in relays:
+                r.start()
+        else:
+            # Without a transcript the processes talk to each other directly
+            transcript = None
+            relays = []
+            to_inter_r, to_inter_w = os.pipe()
+            to_sol_r, to_sol_w = os.pipe()
+
+            sol = subprocess.Popen(solution_cmd, stdin=to_sol_r,
+                                   stdout=to_inter_w, stderr=sol_err)
+            inter = subprocess.Popen(interactor_cmd, stdin=to_inter_r,
+                                     stdout=to_sol_w, stderr=int_err)
+
+            for fd in [to_inter_r, to_inter_w, to_sol_r, to_sol_w]:
+                os.close(fd)
+
+        stopped = threading.Event()
+        watcher = threading.Thread(
+            target=stop_solution, args=(inter, sol, stopped), daemon=True)
+        watcher.start()
+
+        solution_timed_out = wait(sol, start + timeout)
+        time_taken = time.monotonic() - start
+        interactor_timed_out = wait(inter, start + interactor_timeout)
+
+        watcher.join()
+        for r in relays:
+            r.join()
+
+        sol_err.seek(0)
+        int_err.seek(0)
+
+        return Result(
+            verdict(sol.returncode, inter.returncode,
+                    solution_timed_out and not stopped.is_set(),
+                    interactor_timed_out, stopped.is_set()),
+            time_taken,
+            sol_err.read().decode('utf8', errors='replace'),
+            int_err.read().decode('utf8', errors='replace'),
+            transcript)
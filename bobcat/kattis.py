@@ -1,7 +1,9 @@
+import glob
 import io
 import os
 import re
 import shutil
+import tempfile
 import unicodedata
 import zipfile
 
@@ -13,8 +15,9 @@ import requests
 from bs4 import BeautifulSoup
 
 from . import config
+from . import http_cache
 from .language import Languages
-from .model import Sample, Problem, SearchProblem
+from .model import Sample, Problem, SearchProblem, Submission
 
 
 conf, secret_conf, skipped_questions = config.get_conf()
@@ -23,6 +26,10 @@ HOST = conf['config']["host"]
 CACHE_DIR = conf['config']['cache']
 
 
+contest_prob_regex = re.compile(r'/problems/([^/?#]+)$')
+user_regex = re.compile(r'^/users/([^/?#]+)$')
+
+
 class ProblemNotFound(Exception):
     pass
 
@@ -31,9 +38,24 @@ class AuthError(Exception):
     pass
 
 
+def problem_path(problem_id: str) -> str:
+    return f"/problems/{problem_id}"
+
+
+def sample_dir(problem_id: str) -> str:
+    return os.path.join(config.SAMPLES_DIR, problem_id)
+
+
+def has_samples(problem_id: str) -> bool:
+    # Failed downloads used to leave a directory without samples behind
+    return bool(glob.glob(f'{sample_dir(problem_id)}/*.in'))
+
+
 def login(username: str, password: str):
     LOGIN_URL = urljoin(HOST, 'login/email?')
     s = requests.Session()
+    s.mount('https://', http_cache.CachingAdapter(
+        http_cache.make_policies(conf)))
 
     res = s.get(LOGIN_URL)
     soup = BeautifulSoup(res.text, features='lxml')
@@ -56,9 +78,11 @@ def submit(
         s: requests.Session,
         problem_path,
         source_file,
-        langs: Languages) -> int:
-    with open(os.path.expanduser(source_file), 'r') as f:
-        source = f.read()
+        langs: Languages,
+        source: str | None = None) -> int:
+    if source is None:
+        with open(os.path.expanduser(source_file), 'r') as f:
+            source = f.read()
 
     file_name = Path(source_file).name
     lang = langs.get_lang(source_file)
@@ -122,11 +146,12 @@ def fetch_prob(s: requests.Session,
     _ = [s.tr.extract() for s in samples]
 
     # We will face error trying to extract samples of "interactive" problems
+    # They are tested locally with an interactor instead
     try:
         samples = [Sample(input_=s.tr.td.extract().text,
                           output_=s.tr.td.extract().text) for s in samples]
     except Exception:
-        return body.text.strip(), []
+        samples = []
 
     for p in body.find_all('p'):
         p.replace_with(re.sub(r'\s+', ' ', p.text))
@@ -153,22 +178,74 @@ def get_result(s: requests.Session,
     return result, test_cases, time_taken
 
 
+def get_username(s: requests.Session) -> str:
+    res = s.get(HOST)
+    soup = BeautifulSoup(res.text, features='lxml')
+
+    link = soup.find('a', href=user_regex)
+    if link is None:
+        raise AuthError("Unable to find username")
+
+    return user_regex.match(link['href']).group(1)
+
+
+def get_submissions(
+        s: requests.Session,
+        username: str,
+        page: int) -> list[Submission]:
+    url: Final = urljoin(
+        HOST, f"/users/{quote(username)}/submissions?page={page + 1}")
+
+    res = s.get(url)
+
+    soup = BeautifulSoup(res.text, features='lxml')
+    trs = soup.find_all('tr', attrs={'data-submission-id': True})
+
+    def cell(tr, data_type: str) -> str:
+        td = tr.find('td', {'data-type': data_type})
+        return unicodedata.normalize("NFKD", td.text).strip() if td else ""
+
+    def problem_id(tr) -> str:
+        link = tr.find('td', {'data-type': 'problem'}).find(
+            'a', href=contest_prob_regex)
+        return contest_prob_regex.search(link['href']).group(1)
+
+    return [
+        Submission(
+            id=int(tr['data-submission-id']),
+            problem=problem_id(tr),
+            language=cell(tr, 'lang'),
+            verdict=cell(tr, 'status'),
+            cpu_time=cell(tr, 'cpu'),
+            timestamp=cell(tr, 'time')) for tr in trs]
+
+
 def download_samples(
         s: requests.Session,
         path: str,
-        save_to=CACHE_DIR) -> None:
-    shutil.rmtree(save_to)
-    Path(save_to).mkdir(parents=True, exist_ok=True)
+        save_to=CACHE_DIR) -> bool:
     sample_url: Final = urljoin(
         HOST, f"{path}/file/statement/samples.zip")
     r = s.get(sample_url, stream=True)
 
+    # Extracted beside the destination and moved into place once complete,
+    # so a failed download leaves nothing that looks like downloaded samples
+    Path(save_to).parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=Path(save_to).parent)
+
     try:
         with zipfile.ZipFile(io.BytesIO(r.content)) as z:
-            z.extractall(save_to)
+            z.extractall(tmp_dir)
     except Exception:
-        print("No samples")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+    shutil.rmtree(save_to, ignore_errors=True)
+    os.replace(tmp_dir, save_to)
+    return True
+
 
+PENDING_STATUSES: Final[list[str]] = ['Running', 'New', 'Compiling']
 
 FILTERS: Final[dict[str, str]] = {
     "untried": "f_untried",
@@ -219,6 +296,21 @@ def get_probs(
                 class_='difficulty_number').text) for tr in trs]
 
 
+def get_contest_probs(
+        s: requests.Session,
+        contest_id: str) -> list[str]:
+    url: Final = urljoin(
+        HOST, f"/contests/{quote(contest_id)}/problems")
+
+    res = s.get(url)
+
+    soup = BeautifulSoup(res.text, features='lxml')
+    problem_ids = [m.group(1) for a in soup.find_all('a', href=True)
+                   if (m := contest_prob_regex.search(a['href']))]
+
+    return list(dict.fromkeys(problem_ids))
+
+
 def find_probs(
         s: requests.Session,
         term: str) -> list[SearchProblem]:
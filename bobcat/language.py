@@ -1,4 +1,7 @@
 import configparser
+import hashlib
+import os
+import shlex
 from dataclasses import dataclass
 from ast import literal_eval
 from pathlib import Path
@@ -11,6 +14,17 @@ class Language:
     build_cmd: str
     run_cmd: str
 
+    def format_build(self, source_file: str, cache_dir: str) -> str:
+        return self.build_cmd.format(
+            source_file=shlex.quote(os.path.expanduser(source_file)),
+            cache_dir=shlex.quote(cache_dir))
+
+    # Programs are run without a shell, so paths are expanded here
+    def format_run(self, source_file: str, cache_dir: str) -> list[str]:
+        return shlex.split(self.run_cmd.format(
+            source_file=shlex.quote(os.path.expanduser(source_file)),
+            cache_dir=shlex.quote(cache_dir)))
+
 
 class ExtensionNotSupported(Exception):
     pass
@@ -29,6 +43,11 @@ class Languages:
         return lang
 
 
+def source_hash(file: str) -> str:
+    with open(os.path.expanduser(file), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
 def make_languages(config: configparser.ConfigParser) -> Languages:
     LANGUAGE_CONF = config["languages"]
     LANGUAGE_CONF = {k: literal_eval(v) for k, v in LANGUAGE_CONF.items()}
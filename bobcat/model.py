@@ -1,26 +1,36 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Sample:
     input_: str
     output_: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Problem:
     title: str
     path: str
     difficulty: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ConcreteProblem(Problem):
     description: str
     samples: list[Sample]
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchProblem:
     title: str
     path: str
+
+
+@dataclass(slots=True)
+class Submission:
+    id: int
+    problem: str
+    language: str
+    verdict: str
+    cpu_time: str
+    timestamp: str
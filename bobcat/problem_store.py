@@ -0,0 +1,33 @@
+import json
+import os
+
+from dataclasses import asdict
+from pathlib import Path
+
+from . import config
+from .model import ConcreteProblem, Sample
+
+
+def store_file(path: str) -> str:
+    return os.path.join(config.PROBLEM_STORE_DIR,
+                        f"{path.removeprefix('/problems/')}.json")
+
+
+def load(path: str) -> ConcreteProblem | None:
+    try:
+        with open(store_file(path), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    samples = [Sample(**x) for x in data.pop('samples')]
+    return ConcreteProblem(**data, samples=samples)
+
+
+def save(prob: ConcreteProblem):
+    Path(config.PROBLEM_STORE_DIR).mkdir(parents=True, exist_ok=True)
+
+    tmp_file = f"{store_file(prob.path)}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(asdict(prob), f)
+    os.replace(tmp_file, store_file(prob.path))
@@ -0,0 +1,146 @@
+import os
+import pstats
+import re
+import shutil
+import signal
+import subprocess
+import time
+
+from collections import Counter
+from pathlib import Path
+
+# Seconds between backtraces taken when sampling with gdb
+SAMPLE_INTERVAL = 0.05
+
+frame_regex = re.compile(r'^#\d+\s+(?:0x[0-9a-f]+ in )?(\S+) \(')
+
+
+def find_case(in_files: list[str], test_case_dir: str,
+              case: str | None) -> str | None:
+    if not case:
+        return max(in_files, key=os.path.getsize, default=None)
+
+    candidates = [case, f'{test_case_dir}/{case}', f'{test_case_dir}/{case}.in']
+    return next((c for c in candidates if os.path.isfile(c)), None)
+
+
+def is_native(cmd: list[str], cache_dir: str) -> bool:
+    return Path(cmd[0]).resolve().parent == Path(cache_dir).resolve()
+
+
+def run(cmd: list[str], in_file: str, timeout: float) -> bool:
+    with open(in_file, 'rb') as f:
+        p = subprocess.Popen(cmd, stdin=f, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL)
+
+        try:
+            p.wait(timeout)
+            return False
+        except subprocess.TimeoutExpired:
+            # Both cProfile and perf still write out what they collected when
+            # interrupted, so the profile up to the timeout is not lost
+            p.send_signal(signal.SIGINT)
+
+        try:
+            p.wait(5)
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.wait()
+
+    return True
+
+
+def profile_python(cmd: list[str], in_file: str, out_dir: str,
+                   timeout: float, top: int) -> bool:
+    stats_file = os.path.join(out_dir, 'profile.pstats')
+    timed_out = run([cmd[0], '-m', 'cProfile', '-o', stats_file, *cmd[1:]],
+                    in_file, timeout)
+
+    if not os.path.exists(stats_file):
+        print("No profile was collected")
+        return timed_out
+
+    pstats.Stats(stats_file).strip_dirs().sort_stats(
+        'cumulative').print_stats(top)
+    os.remove(stats_file)
+
+    return timed_out
+
+
+def profile_perf(cmd: list[str], in_file: str, out_dir: str,
+                 timeout: float, top: int) -> bool:
+    perf_file = os.path.join(out_dir, 'perf.data')
+    timed_out = run(['perf', 'record', '--quiet', '-g', '-o', perf_file,
+                     '--', *cmd], in_file, timeout)
+
+    report = subprocess.run(
+        ['perf', 'report', '--stdio', '--children', '--sort', 'symbol',
+         '-g', 'none', '-i', perf_file],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode('utf8')
+    lines = [line for line in report.splitlines()
+             if line.strip() and not line.startswith('#')]
+
+    print(f"{'Children':>10}{'Self':>10}  Symbol")
+    print("\n".join(lines[:top]) if lines else "No samples were collected")
+
+    return timed_out
+
+
+def profile_gdb(cmd: list[str], in_file: str,
+                timeout: float, top: int) -> bool:
+    total, own = Counter(), Counter()
+    samples = 0
+
+    with open(in_file, 'rb') as f:
+        p = subprocess.Popen(cmd, stdin=f, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL)
+        start = time.monotonic()
+
+        while p.poll() is None and time.monotonic() - start < timeout:
+            bt = subprocess.run(
+                ['gdb', '-batch', '-nx', '-p', str(p.pid), '-ex', 'bt'],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode('utf8')
+            frames = [m.group(1) for line in bt.splitlines()
+                      if (m := frame_regex.match(line))]
+
+            if frames:
+                samples += 1
+                own[frames[0]] += 1
+                total.update(set(frames))
+
+            time.sleep(SAMPLE_INTERVAL)
+
+        timed_out = p.poll() is None
+        if timed_out:
+            p.kill()
+        p.wait()
+
+    if not samples:
+        print("No samples were collected. gdb may not be allowed to attach to the program")
+        return timed_out
+
+    print(f"{samples} samples")
+    print(f"{'Total':>8}{'Self':>8}  Function")
+    for func, count in total.most_common(top):
+        print(f"{count / samples:>8.1%}{own[func] / samples:>8.1%}  {func}")
+
+    return timed_out
+
+
+def profile(cmd: list[str], in_file: str, cache_dir: str,
+            is_python: bool, timeout: float, top: int):
+    if is_python:
+        timed_out = profile_python(cmd, in_file, cache_dir, timeout, top)
+    elif not is_native(cmd, cache_dir):
+        print("Profiling is only supported for Python and built binaries")
+        return
+    elif shutil.which('perf'):
+        timed_out = profile_perf(cmd, in_file, cache_dir, timeout, top)
+    elif shutil.which('gdb'):
+        timed_out = profile_gdb(cmd, in_file, timeout, top)
+    else:
+        print("Install perf or gdb to profile built binaries")
+        return
+
+    if timed_out:
+        print(f"Program timed out after {timeout}s. Profile only covers the run until then")
@@ -0,0 +1,71 @@
+import io
+import math
+import os
+import shutil
+import sys
+
+# Moves the cursor home, then clears the screen and scrollback
+CLEAR = "\x1b[H\x1b[2J\x1b[3J"
+
+
+def is_tty() -> bool:
+    return sys.stdout.isatty()
+
+
+def write(text: str):
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        sys.stdout.write(text)
+        return
+
+    sys.stdout.flush()
+    view = memoryview(text.encode(sys.stdout.encoding or 'utf8', errors='replace'))
+
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def clear():
+    if is_tty():
+        write(CLEAR)
+
+
+def show(text: str):
+    write(CLEAR + text if is_tty() else text)
+
+
+def pages(text: str, width: int, height: int) -> list[str]:
+    result, current, rows = [], [], 0
+
+    for line in text.splitlines(keepends=True):
+        line_rows = max(1, math.ceil(len(line.rstrip('\n')) / width))
+
+        if current and rows + line_rows > height:
+            result.append("".join(current))
+            current, rows = [], 0
+
+        current.append(line)
+        rows += line_rows
+
+    return [*result, "".join(current)]
+
+
+def page(text: str):
+    if not is_tty():
+        write(text)
+        return
+
+    size = shutil.get_terminal_size()
+    # Last row is kept for the prompt
+    chunks = pages(text, size.columns, size.lines - 1)
+
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            show(chunk)
+        else:
+            write(chunk)
+
+        if i + 1 < len(chunks) and input(
+                f"-- page {i + 1}/{len(chunks)}. Enter for more, q to stop -- ").upper() == 'Q':
+            break
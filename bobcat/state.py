@@ -1,19 +1,52 @@
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from requests import Session
 
+from . import config
 from . import model
 
+conf, _, _ = config.get_conf()
+
+LOADED_PROBLEMS = conf['config'].getint('loaded_problems')
+
+
+@dataclass
+class LoadedProblems:
+    capacity: int = LOADED_PROBLEMS
+    problems: OrderedDict[str, model.ConcreteProblem] = field(
+        default_factory=OrderedDict)
+
+    def get(self, path: str) -> model.ConcreteProblem | None:
+        prob = self.problems.get(path)
+
+        if prob is not None:
+            self.problems.move_to_end(path)
+
+        return prob
+
+    def put(self, prob: model.ConcreteProblem):
+        self.problems[prob.path] = prob
+        self.problems.move_to_end(prob.path)
+
+        # Evicted problems are left as the lightweight entries in State.problems
+        while len(self.problems) > self.capacity:
+            self.problems.popitem(last=False)
+
 
 @dataclass
 class State:
     session: Session
-    problems: list[model.Problem | model.ConcreteProblem]
+    problems: list[model.Problem]
     index: int
-    curr_prob: model.ConcreteProblem
+    curr_prob: model.Problem | model.ConcreteProblem
     page: int
+    loaded: LoadedProblems = field(default_factory=LoadedProblems)
+    contest: str | None = None
+    # Default solution file of each problem in contest mode
+    solution_files: dict[str, str] = field(default_factory=dict)
 
     def __str__(self):
         return f"{len(self.problems)} problems. index: {self.index}. page: {self.page}. prob: {self.curr_prob.path}"
 
     def with_index(self, idx: int):
-        return State(self.session, self.problems, idx, self.problems[idx], self.page)
+        return replace(self, index=idx, curr_prob=self.problems[idx])
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+import requests
+
+from . import config
+from . import kattis
+from . import command
+from .language import Languages, source_hash
+
+conf, _, _ = config.get_conf()
+
+SUBMIT_INTERVAL = conf['config'].getfloat('submit_interval')
+
+# Entries move from PENDING to PASSED or FAILED after local testing, then
+# through SUBMITTING and SUBMITTED to JUDGED. An entry left in SUBMITTING was
+# interrupted mid-request, so it becomes UNKNOWN rather than being resubmitted.
+# Entries not yet submitted become REPLACED when the same file is added again
+# with a different source, and STALE when the file changed since it was added.
+PENDING = "pending"
+PASSED = "passed"
+FAILED = "failed"
+SUBMITTING = "submitting"
+SUBMITTED = "submitted"
+JUDGED = "judged"
+UNKNOWN = "unknown"
+REPLACED = "replaced"
+STALE = "stale"
+
+
+@dataclass
+class QueueEntry:
+    file: str
+    problem: str
+    source_hash: str
+    status: str = PENDING
+    log: str = ""
+    submission_id: int | None = None
+    verdict: str | None = None
+    test_cases: str | None = None
+    time: str | None = None
+    source: str | None = None
+
+
+@dataclass
+class SubmissionQueue:
+    entries: list[QueueEntry] = field(default_factory=list)
+    last_submit: float = 0
+    path: str = config.QUEUE_FILE
+    # Entries found in SUBMITTING when loaded
+    interrupted: list[QueueEntry] = field(
+        default_factory=list, repr=False, compare=False)
+    lock: threading.RLock = field(
+        default_factory=threading.RLock, repr=False, compare=False)
+
+    @classmethod
+    def load(cls, path: str = config.QUEUE_FILE) -> 'SubmissionQueue':
+        if not os.path.exists(path):
+            return cls(path=path)
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        entries = [QueueEntry(**e) for e in data['entries']]
+        interrupted = [e for e in entries if e.status == SUBMITTING]
+        for e in interrupted:
+            e.status = UNKNOWN
+
+        return cls(entries, data['last_submit'], path, interrupted)
+
+    def save(self):
+        with self.lock:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            data = {"last_submit": self.last_submit,
+                    "entries": [asdict(e) for e in self.entries]}
+
+            tmp_file = f"{self.path}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_file, self.path)
+
+    def add(self, file: str, problem: str) -> QueueEntry:
+        with open(os.path.expanduser(file), 'rb') as f:
+            data = f.read()
+
+        digest = hashlib.sha256(data).hexdigest()
+        source = data.decode()
+        entry = next((e for e in self.entries
+                      if e.problem == problem and e.source_hash == digest), None)
+
+        if entry is None:
+            entry = QueueEntry(file, problem, digest, source=source)
+            self.entries.append(entry)
+        elif entry.status in [FAILED, REPLACED, STALE]:
+            entry.status = PENDING
+            entry.source = source
+
+        for e in self.entries:
+            if e is not entry and e.file == file and e.problem == problem \
+                    and e.status in [PENDING, PASSED]:
+                e.status = REPLACED
+
+        return entry
+
+    def clear_finished(self):
+        self.entries = [e for e in self.entries
+                        if e.status not in [FAILED, JUDGED, UNKNOWN, REPLACED, STALE]]
+
+    def with_status(self, *statuses: str) -> list[QueueEntry]:
+        return [e for e in self.entries if e.status in statuses]
+
+    def record_test(self, entry: QueueEntry, passed: bool, log: str):
+        with self.lock:
+            entry.status = PASSED if passed else FAILED
+            entry.log = log
+            self.save()
+
+    def submit(self,
+               s: requests.Session,
+               entry: QueueEntry,
+               langs: Languages,
+               interval: float = SUBMIT_INTERVAL):
+        wait = self.last_submit + interval - time.time()
+        if wait > 0:
+            time.sleep(wait)
+
+        with self.lock:
+            # The tested source is submitted, but only while the file still
+            # matches it, as the test ran against the file
+            if source_hash(entry.file) != entry.source_hash:
+                entry.status = STALE
+                entry.log = "Source changed since it was added to the queue"
+                self.save()
+                raise ValueError(f"{entry.file} changed since it was added to the queue")
+
+            previous_status = entry.status
+            entry.status = SUBMITTING
+            self.last_submit = time.time()
+            self.save()
+
+        try:
+            submission_id = kattis.submit(
+                s, kattis.problem_path(entry.problem), entry.file, langs,
+                entry.source)
+        except ValueError:
+            # Kattis rejected the submission, so it is safe to try again
+            with self.lock:
+                entry.status = previous_status
+                self.save()
+            raise
+
+        with self.lock:
+            entry.submission_id = submission_id
+            entry.status = SUBMITTED
+            self.save()
+
+    def collect(self, s: requests.Session, entry: QueueEntry):
+        verdict, test_cases, time_taken = command.wait_result(
+            s, entry.submission_id)
+        command.record_submission(
+            entry.submission_id, kattis.problem_path(entry.problem), entry.file,
+            (verdict, test_cases, time_taken))
+
+        with self.lock:
+            entry.verdict, entry.test_cases, entry.time = verdict, test_cases, time_taken
+            entry.status = JUDGED
+            self.save()
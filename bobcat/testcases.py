@@ -0,0 +1,230 @@
+import glob
+import json
+import mmap
+import os
+import subprocess
+
+from contextlib import contextmanager
+from pathlib import Path
+
+from . import config
+
+# Outputs up to this size are compared with diff, so the whole difference
+# can be shown. Larger ones are compared through mmap without being read
+DIFF_LIMIT = 1 << 16
+CHUNK_SIZE = 1 << 20
+# Characters shown of inputs and mismatched lines
+PREVIEW_LIMIT = 2000
+
+
+def load_dirs() -> dict[str, list[str]]:
+    try:
+        with open(config.TESTS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_dirs(dirs: dict[str, list[str]]):
+    Path(config.TESTS_FILE).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(config.TESTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(dirs, f, indent=2)
+
+
+def add_dir(problem_id: str, directory: str):
+    dirs = load_dirs()
+    directory = os.path.abspath(os.path.expanduser(directory))
+
+    if directory not in dirs.setdefault(problem_id, []):
+        dirs[problem_id].append(directory)
+        save_dirs(dirs)
+
+
+def remove_dir(problem_id: str, directory: str) -> bool:
+    dirs = load_dirs()
+    directory = os.path.abspath(os.path.expanduser(directory))
+
+    if directory not in dirs.get(problem_id, []):
+        return False
+
+    dirs[problem_id].remove(directory)
+    save_dirs(dirs)
+    return True
+
+
+def generated_dir(problem_id: str) -> str:
+    return os.path.join(config.GENERATED_DIR, problem_id)
+
+
+def generated_file(problem_id: str, gen_hash: str, seed: int) -> str:
+    return os.path.join(generated_dir(problem_id), f"{gen_hash[:16]}-{seed}.in")
+
+
+def manifest_file(problem_id: str) -> str:
+    return os.path.join(generated_dir(problem_id), 'active.json')
+
+
+def generated_inputs(problem_id: str) -> list[str]:
+    # Inputs of every generator and seed are kept, but only those of the
+    # last request are tested
+    try:
+        with open(manifest_file(problem_id), 'r', encoding='utf-8') as f:
+            active = json.load(f)
+    except (OSError, ValueError):
+        return []
+
+    files = [generated_file(problem_id, active["hash"], seed) for seed in active["seeds"]]
+    return [f for f in files if os.path.exists(f)]
+
+
+def generate(cmd: list[str],
+             problem_id: str,
+             gen_hash: str,
+             seeds: list[int],
+             timeout: float) -> dict[int, str]:
+    Path(generated_dir(problem_id)).mkdir(parents=True, exist_ok=True)
+
+    errors = {}
+    for seed in seeds:
+        file = generated_file(problem_id, gen_hash, seed)
+        if os.path.exists(file):
+            continue
+
+        ret_code, err = run([*cmd, str(seed)], os.devnull, f"{file}.tmp", timeout)
+
+        if ret_code == 0:
+            os.replace(f"{file}.tmp", file)
+            continue
+
+        os.remove(f"{file}.tmp")
+        errors[seed] = "Generator timed out" if ret_code is None else \
+            f"Generator terminated with exit code {ret_code}\n{err}"
+
+    with open(manifest_file(problem_id), 'w', encoding='utf-8') as f:
+        json.dump({"hash": gen_hash, "seeds": seeds}, f)
+
+    return errors
+
+
+def answer_file(in_file: str, own_outputs: bool) -> str | None:
+    stem = in_file.removesuffix('.in')
+    candidates = [f'{stem}.ans'] if own_outputs else [f'{stem}.ans', f'{stem}.out']
+
+    return next((c for c in candidates if os.path.exists(c)), None)
+
+
+def cases(test_case_dir: str,
+          problem_id: str | None = None) -> list[tuple[str, str | None, str]]:
+    # Outputs of samples are written next to them as before. Other inputs
+    # may live in directories that are not ours to write to, so their
+    # outputs go to a directory of the problem that is created when tested
+    result = [(f, answer_file(f, True), f"{f.removesuffix('.in')}.out")
+              for f in sorted(glob.glob(f'{test_case_dir}/*.in'))]
+
+    if not problem_id:
+        return result
+
+    out_dir = os.path.join(config.OUTPUTS_DIR, problem_id)
+    in_files = [f for d in load_dirs().get(problem_id, [])
+                for f in sorted(glob.glob(f'{d}/*.in'))]
+    in_files.extend(generated_inputs(problem_id))
+
+    return [*result, *((f, answer_file(f, False), os.path.join(out_dir, f"{i}.out"))
+                       for i, f in enumerate(in_files))]
+
+
+def case_name(in_file: str, test_case_dir: str) -> str:
+    if os.path.dirname(in_file) == test_case_dir:
+        return os.path.basename(in_file)
+
+    return os.path.join(os.path.basename(os.path.dirname(in_file)),
+                        os.path.basename(in_file))
+
+
+def run(cmd: list[str], in_file: str, out_file: str,
+        timeout: float) -> tuple[int | None, str]:
+    # The program reads from and writes to the files directly, so nothing
+    # passes through a shell or this process
+    with open(in_file, 'rb') as stdin, open(out_file, 'wb') as stdout:
+        p = subprocess.Popen(cmd, stdin=stdin, stdout=stdout,
+                             stderr=subprocess.PIPE)
+
+        try:
+            _, err = p.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            p.kill()
+            p.communicate()
+            return None, ""
+
+    return p.returncode, err.decode('utf8', errors='replace')
+
+
+@contextmanager
+def mapped(file: str):
+    with open(file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            yield m
+
+
+def first_difference(a, b) -> int | None:
+    size = min(len(a), len(b))
+
+    for start in range(0, size, CHUNK_SIZE):
+        end = min(start + CHUNK_SIZE, size)
+        if a[start:end] == b[start:end]:
+            continue
+
+        # Narrow down to the first differing byte by halving the chunk
+        while end - start > 1:
+            mid = (start + end) // 2
+            if a[start:mid] == b[start:mid]:
+                start = mid
+            else:
+                end = mid
+
+        return start
+
+    return None if len(a) == len(b) else size
+
+
+def line_at(m, offset: int) -> str:
+    start = m.rfind(b'\n', 0, offset) + 1
+    end = m.find(b'\n', offset)
+    line = m[start:end if end != -1 else len(m)]
+
+    return line[:PREVIEW_LIMIT].decode('utf8', errors='replace')
+
+
+def compare(out_file: str, ans_file: str) -> str:
+    if max(os.path.getsize(out_file), os.path.getsize(ans_file)) <= DIFF_LIMIT:
+        return subprocess.run(
+            ['diff', '--unified', ans_file, out_file],
+            stdout=subprocess.PIPE).stdout.decode('utf8', errors='replace')
+
+    with mapped(ans_file) as ans, mapped(out_file) as out:
+        offset = first_difference(ans, out)
+
+        if offset is None:
+            return ""
+
+        line = 1 + sum(ans[i:min(i + CHUNK_SIZE, offset)].count(b'\n')
+                       for i in range(0, offset, CHUNK_SIZE))
+
+        return f"First difference at line {line} (byte {offset})\n" \
+            f"-{line_at(ans, offset)}\n" \
+            f"+{line_at(out, offset)}\n"
+
+
+def preview(file: str) -> str:
+    with open(file, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read(PREVIEW_LIMIT + 1)
+
+    if len(text) > PREVIEW_LIMIT:
+        return f"{text[:PREVIEW_LIMIT]}\n... ({os.path.getsize(file)} bytes)"
+
+    return text